@@ -1,8 +1,12 @@
 import streamlit as st
+from streamlit.logger import get_logger
 import fitz
 import pandas as pd
 from datetime import datetime, timedelta
 import re
+import os
+import threading
+from contextlib import contextmanager
 from pymongo import MongoClient
 from bson.objectid import ObjectId
 from fpdf import FPDF
@@ -11,6 +15,11 @@ import certifi
 
 # --- CONFIGURATION ---
 st.set_page_config(page_title="Attendance Tracker Pro", page_icon="📅", layout="wide")
+logger = get_logger(__name__)
+
+# Per-file limit is enforced by Streamlit itself (server.maxUploadSize in .streamlit/config.toml)
+MAX_UPLOAD_MB = st.get_option("server.maxUploadSize")
+DEFAULT_CONCURRENT_UPLOAD_MB = 60
 
 # --- DATABASE CONNECTION (Cached with SSL Fix) ---
 @st.cache_resource
@@ -54,6 +63,53 @@ def format_td(td):
     if total_sec <= 0: return "00:00"
     return f"{total_sec // 3600:02d}:{(total_sec % 3600) // 60:02d}"
 
+def format_bytes(n):
+    for unit in ("B", "KB", "MB"):
+        if n < 1024: return f"{n:.0f} B" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} GB"
+
+def current_rss():
+    # Resident memory right now (Linux only); None where /proc is unavailable
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+# --- UPLOAD BUDGET (Shared across all sessions) ---
+class UploadLimitError(Exception):
+    pass
+
+@st.cache_resource
+def get_upload_budget():
+    # Runs once per server process, so a bad setting is logged once rather than on every rerun
+    raw = os.environ.get("ATTENDANCE_MAX_CONCURRENT_UPLOAD_MB", str(DEFAULT_CONCURRENT_UPLOAD_MB))
+    try:
+        limit_mb = int(raw)
+    except ValueError:
+        logger.warning("ATTENDANCE_MAX_CONCURRENT_UPLOAD_MB=%r is not a whole number of MB; using %d",
+                       raw, DEFAULT_CONCURRENT_UPLOAD_MB)
+        limit_mb = DEFAULT_CONCURRENT_UPLOAD_MB
+    if limit_mb < MAX_UPLOAD_MB:
+        logger.warning("ATTENDANCE_MAX_CONCURRENT_UPLOAD_MB (%d) is below server.maxUploadSize (%d); using %d",
+                       limit_mb, MAX_UPLOAD_MB, MAX_UPLOAD_MB)
+        limit_mb = MAX_UPLOAD_MB
+    return {"lock": threading.Lock(), "in_use": 0, "limit": limit_mb * 1024 * 1024}
+
+@contextmanager
+def reserve_upload(size):
+    budget = get_upload_budget()
+    with budget["lock"]:
+        if budget["in_use"] + size > budget["limit"]:
+            raise UploadLimitError("The server is busy processing other uploads. Please try again in a moment.")
+        budget["in_use"] += size
+    try:
+        yield
+    finally:
+        with budget["lock"]:
+            budget["in_use"] -= size
+
 def process_pdf(uploaded_file, gender):
     STD_WEEKDAY_MALE = timedelta(hours=9, minutes=10)
     STD_WEEKDAY_FEMALE = timedelta(hours=8, minutes=25)
@@ -64,16 +120,17 @@ def process_pdf(uploaded_file, gender):
     doc = fitz.open(stream=pdf_stream, filetype="pdf")
     text = "".join([page.get_text() for page in doc])
     doc.close()
+    lines = text.split('\n')
+    del text
 
     emp_info = {}
-    for line in text.split('\n'):
+    for line in lines:
         if "Employee Name" in line: emp_info['Name'] = line.split(":")[-1].strip()
         if "Employee Code" in line: emp_info['Code'] = line.split(":")[-1].strip()
 
     processed_data = []
     total_extra_sec = 0
     absent_count = 0
-    lines = text.split('\n')
 
     for i, line in enumerate(lines):
         date_match = re.search(r'(\d{2}/\d{2}/\d{4})', line)
@@ -112,6 +169,7 @@ def process_pdf(uploaded_file, gender):
                 "Work": format_td(work_td), "Extra": format_td(extra_td),
                 "Status": "Absent" if is_absent else ("Present" if in_time != "-" else "Off/Holiday")
             })
+    del lines
 
     divisor_seconds = current_std_weekday.total_seconds()
     # 20-minute tolerance (1200 seconds) for earned leave calculation
@@ -134,7 +192,22 @@ choice = st.radio("Navigation", ["📊 Calculator", "📂 Records History"], hor
 # --- CALCULATOR VIEW ---
 if choice == "📊 Calculator":
     if uploaded_file:
-        info, df, extra_sec, absents, earned_days = process_pdf(uploaded_file, gender_input)
+        # Parse once per upload and gender; reruns from other widgets reuse the result
+        result_key = (uploaded_file.file_id, gender_input)
+        if st.session_state.get("pdf_result_key") != result_key:
+            try:
+                with reserve_upload(uploaded_file.size):
+                    rss_before = current_rss()
+                    st.session_state.pdf_result = process_pdf(uploaded_file, gender_input)
+                    rss_after = current_rss()
+            except UploadLimitError as e:
+                st.error(f"⚠️ {e}")
+                st.stop()
+            st.session_state.pdf_result_key = result_key
+            if rss_before is not None and rss_after is not None:
+                logger.info("Parsed %s (%s): RSS %s -> %s", uploaded_file.name, format_bytes(uploaded_file.size),
+                            format_bytes(rss_before), format_bytes(rss_after))
+        info, df, extra_sec, absents, earned_days = st.session_state.pdf_result
         
         st.markdown(f"### 👤 Profile: **{info.get('Name', 'N/A')}** (`{info.get('Code', 'N/A')}`)")
         